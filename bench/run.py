@@ -0,0 +1,191 @@
+"""Benchmark the donor client against a local stub Wema server.
+
+    python -m bench.run --rows 20000 --latency 2 --json bench.json
+    python -m bench.run --baseline bench.json   # exit 1 on a >20% slowdown
+
+Every case runs in this process against a fresh HOME, cache and SQLite
+database, so results do not depend on (or disturb) the real setup.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def cases(rows, adds, imports):
+    """Yield (name, fn) pairs; each fn runs one case and returns its op count."""
+    from donor.auth import login
+    from donor.donor_manager import DonorManager
+
+    def do_login():
+        login("bench@example.com", "bench")
+        return 1
+
+    yield "login", do_login
+    dm = DonorManager()
+
+    def list_paged():
+        dm.list_donations()
+        return rows
+
+    def list_stream():
+        dm.list_donations(page_size=0)
+        return rows
+
+    def add():
+        for i in range(adds):
+            dm.add_donation(f"Bench {i}", i + 1, wait=True)
+        return adds
+
+    def add_queued():
+        for i in range(adds):
+            dm.add_donation(f"Queued {i}", i + 1)
+        return adds
+
+    def flush():
+        dm.flush()
+        return adds
+
+    def report_online():
+        dm.report("by-donor")
+        return rows
+
+    def sync():
+        dm.sync()
+        return rows
+
+    def report_offline():
+        dm.report("by-donor", offline=True)
+        return rows
+
+    def bulk_import(manager=dm):
+        manager.import_donations(_import_file(imports), restart=True)
+        return imports
+
+    yield "list", list_paged
+    yield "list-stream", list_stream
+    yield "add", add
+    yield "add-queued", add_queued
+    yield "flush", flush
+    yield "report", report_online
+    yield "sync", sync
+    yield "report-offline", report_offline
+    yield "import", bulk_import
+
+    try:
+        sql = DonorManager("sql")
+    except ImportError:
+        return
+
+    def sql_report():
+        sql.report("by-donor")
+        return imports
+
+    yield "sql-import", lambda: bulk_import(sql)
+    yield "sql-report", sql_report
+
+
+def _import_file(count):
+    path = os.path.join(os.environ["HOME"], "import.csv")
+    if not os.path.exists(path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "amount"])
+            writer.writerows((f"Import {i % 1000}", i % 500 + 1) for i in range(count))
+    return path
+
+
+def run(args):
+    from donor import timings
+
+    # A separate process keeps the server's threads off this interpreter's GIL.
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "bench.stub_server", "--port", "0",
+         "--rows", str(args.rows), "--latency", str(args.latency)],
+        stdout=subprocess.PIPE, text=True
+    )
+    try:
+        os.environ["WEMA_BASE_URL"] = stub.stdout.readline().rsplit(" ", 1)[-1].strip()
+        timings.enable()
+
+        results = []
+        with open(os.devnull, "w") as devnull:
+            for name, fn in cases(args.rows, args.adds, args.imports):
+                timings.reset()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(devnull):
+                    ops = fn()
+                elapsed = time.perf_counter() - start
+                http = [r for r in timings.summary() if r["kind"] == "http"]
+                results.append({
+                    "case": name,
+                    "ops": ops,
+                    "seconds": elapsed,
+                    "ops_per_s": ops / elapsed if elapsed else 0.0,
+                    "requests": sum(r["count"] for r in http),
+                    "p50_ms": max((r["p50"] for r in http), default=0.0) * 1000,
+                    "p95_ms": max((r["p95"] for r in http), default=0.0) * 1000,
+                })
+        return results
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser("bench.run")
+    parser.add_argument("--rows", type=int, default=20000, help="donations served by the stub")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub delay per request in ms")
+    parser.add_argument("--adds", type=int, default=200, help="sequential add calls")
+    parser.add_argument("--imports", type=int, default=5000, help="rows in the bulk import")
+    parser.add_argument("--json", metavar="FILE", help="write results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed ops/s drop against the baseline (default 0.2)")
+    args = parser.parse_args()
+
+    # Isolate token, replica and database before any donor module reads them.
+    home = tempfile.mkdtemp(prefix="donor-bench-")
+    os.environ["HOME"] = home
+    os.environ["XDG_CACHE_HOME"] = os.path.join(home, ".cache")
+    os.environ["DONOR_DATABASE_URL"] = f"sqlite:///{os.path.join(home, 'donor.db')}"
+    # The base URL is only known once the stub is listening; run() sets it
+    # before donor.auth is imported.
+    try:
+        results = run(args)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    print(f"{'case':<16} {'ops':>7} {'seconds':>8} {'ops/s':>10} {'requests':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7}")
+    for r in results:
+        print(f"{r['case']:<16} {r['ops']:>7} {r['seconds']:>8.3f} {r['ops_per_s']:>10.0f} "
+              f"{r['requests']:>8} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {r["case"]: r for r in json.load(f)}
+        regressions = [
+            (r["case"], baseline[r["case"]]["ops_per_s"], r["ops_per_s"])
+            for r in results
+            if r["case"] in baseline
+            and r["ops_per_s"] < baseline[r["case"]]["ops_per_s"] * (1 - args.tolerance)
+        ]
+        for case, before, after in regressions:
+            print(f"❌ {case}: {before:.0f} -> {after:.0f} ops/s", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Stub Wema server for benchmarks and manual testing.
+
+Implements ``POST /api/admin/login`` and ``GET``/``POST /api/donations``
+(with ``page``/``pageSize`` paging and ``since``) over a deterministic
+in-memory dataset, with an optional fixed delay per request::
+
+    python -m bench.stub_server --port 5000 --rows 100000 --latency 5
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TOKEN = "bench-token"
+EPOCH = datetime(2024, 1, 1)
+
+
+def make_donations(rows, seed=0):
+    rng = random.Random(seed)
+    donors = max(1, rows // 10)
+    step = 365 * 86400 / max(1, rows)
+    return [
+        {
+            "id": str(i),
+            "name": f"Donor {rng.randrange(donors)}",
+            "amount": rng.randrange(1, 500),
+            "campaign": f"Campaign {rng.randrange(20)}",
+            "createdAt": (EPOCH + timedelta(seconds=int(i * step))).isoformat() + "Z",
+        }
+        for i in range(rows)
+    ]
+
+
+class StubWema:
+    def __init__(self, rows=10000, latency=0.0, host="127.0.0.1", port=0):
+        self.donations = make_donations(rows)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.idempotency = {}
+        self.server = _Server((host, port), _handler(self))
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def list(self, query):
+        rows = self.donations
+        since = query.get("since", [None])[0]
+        if since:
+            rows = [d for d in rows if d["createdAt"] > since]
+        if "pageSize" in query:
+            size = int(query["pageSize"][0])
+            page = int(query.get("page", ["1"])[0])
+            rows = rows[(page - 1) * size:page * size]
+        return rows
+
+    def add(self, data, key=None):
+        with self.lock:
+            # A replayed Idempotency-Key gets the original row back.
+            if key in self.idempotency:
+                return self.idempotency[key]
+            row = dict(data, id=str(len(self.donations)),
+                       createdAt=datetime.utcnow().isoformat() + "Z")
+            self.donations.append(row)
+            if key:
+                self.idempotency[key] = row
+        return row
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when a client opens its whole pool
+    # at once, and the 1s retransmit then dominates the measurement.
+    request_queue_size = 256
+
+
+def _handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Buffer headers and body into one write; with the default unbuffered
+        # wfile they go out as separate segments and Nagle plus delayed ACK
+        # adds ~40ms to every keep-alive request.
+        wbufsize = 64 * 1024
+
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/api/donations":
+                return self._send(404, {"error": "not found"})
+            self._send(200, stub.list(parse_qs(url.query)))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            data = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/api/admin/login":
+                return self._send(200, {"token": TOKEN})
+            if self.path == "/api/donations":
+                return self._send(201, stub.add(data, self.headers.get("Idempotency-Key")))
+            self._send(404, {"error": "not found"})
+
+        def _send(self, status, body):
+            if stub.latency:
+                time.sleep(stub.latency)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser("bench.stub_server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=10000, help="donations to serve")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds per request")
+    args = parser.parse_args()
+
+    stub = StubWema(args.rows, args.latency / 1000, args.host, args.port)
+    print(f"Stub Wema serving {args.rows} donations on {stub.url}", flush=True)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
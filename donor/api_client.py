@@ -1,9 +1,50 @@
+import codecs
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from donor import timings
+
+POOL_SIZE = 16
+TIMEOUT = (3.05, 30)  # (connect, read) seconds
+RETRIES = 3
+BACKOFF = 0.5
+# 500 is left out on purpose: a server error says nothing about whether
+# the request was applied. POSTs are only retried with an Idempotency-Key.
+RETRY_STATUSES = (429, 502, 503, 504)
+PAGE_SIZE = 500
+CHUNK_SIZE = 64 * 1024
+
 
 class WemaAPI:
-    def __init__(self, base_url, token=None):
+    def __init__(self, base_url, token=None, pool_size=POOL_SIZE, timeout=TIMEOUT,
+                 retries=RETRIES, backoff=BACKOFF, retry_statuses=RETRY_STATUSES):
         self.base_url = base_url.rstrip("/")
         self.token = token
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=retry_statuses,
+            # urllib3 retries any 429 carrying Retry-After regardless of the
+            # forcelist, so only honour it when 429 is ours to retry.
+            respect_retry_after_header=429 in retry_statuses,
+            raise_on_status=False,
+        )
+        self.session = _session(pool_size, retry)
+        # A 502/504 or a read timeout does not mean a POST was skipped, so a
+        # POST is only re-sent when it carries an Idempotency-Key and the
+        # server can drop the duplicate.
+        self.idempotent_session = _session(
+            pool_size, retry.new(allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"})
+        )
 
     def headers(self):
         headers = {"Content-Type": "application/json"}
@@ -11,19 +52,275 @@ class WemaAPI:
             headers["Authorization"] = f"Bearer {self.token}"
         return headers
 
-    def get(self, path):
-        res = requests.get(
+    def get(self, path, params=None):
+        started = time.perf_counter()
+        res = self.session.get(
             f"{self.base_url}{path}",
-            headers=self.headers()
+            params=params,
+            headers=self.headers(),
+            timeout=self.timeout
         )
-        res.raise_for_status()
-        return res.json()
+        return self._decode(res, path, time.perf_counter() - started)
 
-    def post(self, path, data):
-        res = requests.post(
+    def post(self, path, data, headers=None):
+        headers = {**self.headers(), **(headers or {})}
+        session = self.idempotent_session if "Idempotency-Key" in headers else self.session
+        started = time.perf_counter()
+        res = session.post(
             f"{self.base_url}{path}",
             json=data,
-            headers=self.headers()
+            headers=headers,
+            timeout=self.timeout
+        )
+        return self._decode(res, path, time.perf_counter() - started)
+
+    def _decode(self, res, path, elapsed):
+        _record(res, path, elapsed)
+        res.raise_for_status()
+        with timings.timed("decode", f"{res.request.method} {path}"):
+            return res.json()
+
+    def get_many(self, paths, workers=None, return_exceptions=False):
+        """GET every path concurrently over the pool; results keep input order."""
+        return self._map(self.get, [(path,) for path in paths], workers, return_exceptions)
+
+    def post_many(self, path, items, workers=None, headers=None, return_exceptions=False):
+        """POST every item to path concurrently; results keep input order.
+
+        ``headers`` is an optional list of extra headers, one per item. With
+        ``return_exceptions`` a failed call yields its exception in place of a
+        result instead of aborting the batch.
+        """
+        headers = headers or [None] * len(items)
+        calls = [(path, data, h) for data, h in zip(items, headers)]
+        return self._map(self.post, calls, workers, return_exceptions)
+
+    def _map(self, fn, calls, workers, return_exceptions=False):
+        def call(args):
+            try:
+                return fn(*args)
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        # More workers than pooled connections would just queue on the pool.
+        workers = min(workers or self.pool_size, self.pool_size, len(calls)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(call, calls))
+
+    def iter_items(self, path, params=None, page_size=PAGE_SIZE, prefetch=True):
+        """Yield the items of a list endpoint one at a time.
+
+        Pages are requested with ``page``/``pageSize`` and follow ``nextCursor``
+        when the server answers with an envelope. ``page_size=0`` sends a single
+        request and parses the JSON array incrementally off the socket.
+        """
+        params = dict(params or {})
+        if not page_size:
+            with self._stream(path, params) as res:
+                # Recorded even when the consumer stops early (--limit, | head).
+                try:
+                    yield from _decoded(_iter_json_array(_iter_text(res)), path)
+                finally:
+                    _record(res, path)
+            return
+
+        params.update({"page": 1, "pageSize": page_size})
+        # The first page is yielded as it is parsed rather than collected: a
+        # server that ignores paging sends every row in it.
+        count, first = 0, None
+        with self._stream(path, params) as res:
+            items = None
+            try:
+                started = time.perf_counter()
+                items, cursor = _read_page(res)
+                items = _decoded(items, path, time.perf_counter() - started)
+                for item in items:
+                    if not count:
+                        first = item
+                    count += 1
+                    yield item
+            finally:
+                if hasattr(items, "close"):
+                    items.close()
+                _record(res, path)
+        next_params = _next_params(params, cursor, count, page_size)
+
+        pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        pending = None
+        try:
+            while next_params:
+                if pending:
+                    items, next_params = pending.result()
+                else:
+                    items, next_params = self._fetch_page(path, next_params, page_size)
+                # A server that ignores paging answers every page with the
+                # same rows; a full result of exactly page_size rows would
+                # otherwise be requested forever.
+                if items and _same_item(items[0], first):
+                    return
+                first = items[0] if items else None
+                pending = None
+                if next_params and pool:
+                    pending = pool.submit(self._fetch_page, path, next_params, page_size)
+                yield from items
+        finally:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _stream(self, path, params):
+        res = self.session.get(
+            f"{self.base_url}{path}",
+            params=params,
+            headers=self.headers(),
+            timeout=self.timeout,
+            stream=True
         )
+        if not res.ok:
+            _record(res, path)
         res.raise_for_status()
-        return res.json()
+        return res
+
+    def _fetch_page(self, path, params, page_size):
+        with self._stream(path, params) as res, timings.timed("decode", f"GET {path}"):
+            # Parsing overlaps the body transfer, so this "decode" time also
+            # includes waiting on the socket after the headers arrived.
+            items, cursor = _read_page(res)
+            items = list(items)
+            _record(res, path)
+        return items, _next_params(params, cursor, len(items), page_size)
+
+    def close(self):
+        self.session.close()
+        self.idempotent_session.close()
+
+
+def _session(pool_size, retry):
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+def _record(res, path, elapsed=None):
+    """Log a finished response: latency, wire bytes in and body bytes out.
+
+    ``elapsed`` is the wall time of the whole call, body download and
+    retries included. Streamed responses omit it and log time to headers;
+    their body time is in the "decode" record that wraps the parse.
+    """
+    try:
+        received = res.raw.tell()
+    except (AttributeError, OSError):
+        received = 0
+    sent = res.request.body or b""
+    if elapsed is None:
+        elapsed = res.elapsed.total_seconds()
+    timings.record("http", f"{res.request.method} {path}", elapsed, received, len(sent))
+
+
+def _decoded(items, path, spent=0.0):
+    """Yield ``items``, recording the time spent producing them as one
+    "decode" record; time the consumer spends between items is left out."""
+    if not timings.enabled():
+        yield from items
+        return
+    items = iter(items)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                spent += time.perf_counter() - start
+            yield item
+    finally:
+        timings.record("decode", f"GET {path}", spent)
+
+
+def _read_page(res):
+    """Return ``(items, nextCursor)`` for one list response.
+
+    A bare array comes back as a lazy iterator over the stream; an envelope
+    (``data``/``items`` plus ``nextCursor``) is parsed whole.
+    """
+    chunks = _iter_text(res)
+    first = ""
+    for first in chunks:
+        if first.strip():
+            break
+    chunks = chain([first], chunks)
+    if first.lstrip().startswith("["):
+        return _iter_json_array(chunks), None
+    body = json.loads("".join(chunks))
+    return body.get("data", body.get("items", [])), body.get("nextCursor")
+
+
+def _next_params(params, cursor, count, page_size):
+    if cursor:
+        next_params = {k: v for k, v in params.items() if k != "page"}
+        next_params["cursor"] = cursor
+        return next_params
+    if count == page_size and "cursor" not in params:
+        # Fewer rows than asked means the last page; more means the server
+        # ignored paging and already sent everything.
+        return dict(params, page=params["page"] + 1)
+    return None
+
+
+def _same_item(a, b):
+    if isinstance(a, dict) and isinstance(b, dict) and ("id" in a or "_id" in a):
+        return a.get("id", a.get("_id")) == b.get("id", b.get("_id"))
+    return a == b
+
+
+def _iter_text(res):
+    decoder = codecs.getincrementaldecoder(res.encoding or "utf-8")()
+    for chunk in res.iter_content(CHUNK_SIZE):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _iter_json_array(chunks):
+    """Yield the elements of a top-level JSON array from a stream of text chunks."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    started = False
+    for chunk in chunks:
+        buf += chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break
+            # A bare number or literal is only complete once a delimiter
+            # follows it: "12." parses as 12 and "1e" as 1.
+            if buf[pos] not in "{[\"" and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+                break
+            yield obj
+            pos = end
+        buf = buf[pos:]
+    if started:
+        raise ValueError("Truncated JSON array")
@@ -1,10 +1,15 @@
 import os
-from donor.api_client import WemaAPI
 
 TOKEN_FILE = os.path.expanduser("~/.wema_token")
-BASE_URL = "http://localhost:5000"
+BASE_URL = os.environ.get("WEMA_BASE_URL", "http://localhost:5000")
+
+# Token read once per process; shell and batch runs reuse it for every command.
+_token = None
 
 def login(email, password):
+    global _token
+    from donor.api_client import WemaAPI
+
     api = WemaAPI(BASE_URL)
     data = api.post("/api/admin/login", {
         "email": email,
@@ -17,11 +22,15 @@ def login(email, password):
 
     with open(TOKEN_FILE, "w") as f:
         f.write(token)
+    _token = token
 
     print("✅ Logged in to Wema")
 
 def load_token():
-    if not os.path.exists(TOKEN_FILE):
-        raise Exception("Please login first")
-    with open(TOKEN_FILE) as f:
-        return f.read().strip()
+    global _token
+    if _token is None:
+        if not os.path.exists(TOKEN_FILE):
+            raise Exception("Please login first")
+        with open(TOKEN_FILE) as f:
+            _token = f.read().strip()
+    return _token
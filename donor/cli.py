@@ -1,27 +1,268 @@
 import argparse
-from donor.donor_manager import DonorManager
-from donor.user_manager import admin_login
+import os
+import shlex
+import sys
+import time
+from contextlib import contextmanager
 
-parser = argparse.ArgumentParser("donor")
-sub = parser.add_subparsers(dest="command")
+# Only argparse and the stdlib are imported up front so `donor --help` and
+# argument errors stay fast; requests, sqlite and SQLAlchemy are pulled in by
+# the command that needs them.
 
-login_cmd = sub.add_parser("login")
-login_cmd.add_argument("--email", required=True)
-login_cmd.add_argument("--password", required=True)
 
-sub.add_parser("list")
+def build_parser():
+    parser = argparse.ArgumentParser("donor")
+    parser.add_argument("--backend", choices=["http", "sql"],
+                        default=os.environ.get("DONOR_BACKEND", "http"),
+                        help="talk to the Wema API or the local SQL database")
+    parser.add_argument("--timings", action="store_true",
+                        help="print request, decode and render latency percentiles at exit")
+    parser.add_argument("--timings-json", metavar="FILE",
+                        help="write every timing record and the summary to FILE")
+    parser.add_argument("--profile", action="store_true",
+                        help="run under cProfile and print the top functions at exit")
+    sub = parser.add_subparsers(dest="command")
 
-add_cmd = sub.add_parser("add")
-add_cmd.add_argument("--name", required=True)
-add_cmd.add_argument("--amount", type=int, required=True)
+    login_cmd = sub.add_parser("login")
+    login_cmd.add_argument("--email", required=True)
+    login_cmd.add_argument("--password", required=True)
 
-args = parser.parse_args()
+    list_cmd = sub.add_parser("list")
+    list_cmd.add_argument("--page-size", type=int, default=500,
+                          help="rows per request; 0 streams one unpaged response")
+    list_cmd.add_argument("--limit", type=int, help="stop after this many rows")
+    list_cmd.add_argument("--since", help="only donations created after this timestamp")
+    list_cmd.add_argument("--offline", action="store_true",
+                          help="read the local replica without contacting the server")
+    list_cmd.add_argument("--max-age", type=float, metavar="SECONDS",
+                          help="read the local replica, syncing it first if older than this")
 
-if args.command == "login":
-    admin_login(args.email, args.password)
+    sub.add_parser("sync", help="fetch new donations into the local replica")
 
-elif args.command == "list":
-    DonorManager().list_donations()
+    add_cmd = sub.add_parser("add")
+    add_cmd.add_argument("--name", required=True)
+    add_cmd.add_argument("--amount", type=int, required=True)
+    add_cmd.add_argument("--wait", action="store_true",
+                         help="post to the server now instead of queueing in the outbox")
 
-elif args.command == "add":
-    DonorManager().add_donation(args.name, args.amount)
+    flush_cmd = sub.add_parser("flush", help="send queued donations to the server")
+    flush_cmd.add_argument("--batch-size", type=int, default=100)
+    flush_cmd.add_argument("--concurrency", type=int, default=8, help="maximum requests in flight")
+    flush_cmd.add_argument("--every", type=float, metavar="SECONDS",
+                           help="keep running and flush again after this many seconds")
+
+    outbox_cmd = sub.add_parser("outbox", help="inspect the queue of unsent donations")
+    outbox_sub = outbox_cmd.add_subparsers(dest="outbox", required=True)
+    outbox_sub.add_parser("status", help="queue depth and age of the oldest entry")
+    outbox_sub.add_parser("requeue", help="queue rejected donations again")
+
+    import_cmd = sub.add_parser("import")
+    import_cmd.add_argument("file", help="CSV or NDJSON file with name and amount columns")
+    import_cmd.add_argument("--format", choices=["csv", "ndjson"],
+                            help="defaults to the file extension")
+    import_cmd.add_argument("--concurrency", type=int, default=32,
+                            help="maximum requests in flight")
+    import_cmd.add_argument("--restart", action="store_true",
+                            help="ignore the checkpoint and import every row again")
+
+    report_cmd = sub.add_parser("report", help="aggregate donations")
+    report_sub = report_cmd.add_subparsers(dest="report", required=True)
+    for name in ("total", "by-donor", "by-campaign", "top", "timeseries"):
+        r = report_sub.add_parser(name)
+        r.add_argument("--format", choices=["table", "json", "csv"], default="table")
+        r.add_argument("--since", help="only donations created after this timestamp")
+        r.add_argument("--offline", action="store_true",
+                       help="read the local replica without contacting the server")
+        r.add_argument("--max-age", type=float, metavar="SECONDS",
+                       help="read the local replica, syncing it first if older than this")
+        if name == "top":
+            r.add_argument("-n", "--top", type=int, default=10, help="number of donors to show")
+        if name == "timeseries":
+            r.add_argument("--period", choices=["day", "week", "month"], default="day")
+
+    search_cmd = sub.add_parser("search", help="ranked, typo-tolerant donor or campaign lookup")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--in", dest="kind", choices=["donors", "campaigns"], default="donors")
+    search_cmd.add_argument("--limit", type=int, default=10)
+
+    sub.add_parser("shell", help="interactive prompt that keeps one session open")
+
+    batch_cmd = sub.add_parser("batch", help="run one command per line from a file or stdin")
+    batch_cmd.add_argument("file", nargs="?", default="-", help="defaults to stdin")
+
+    return parser
+
+
+class Session:
+    """Parser and DonorManagers shared by every command of one process."""
+
+    def __init__(self):
+        self.parser = build_parser()
+        self.managers = {}
+
+    def manager(self, backend):
+        if backend not in self.managers:
+            from donor.donor_manager import DonorManager
+            self.managers[backend] = DonorManager(backend)
+        return self.managers[backend]
+
+    def execute(self, line):
+        """Run one command line inside this session; returns False on failure."""
+        try:
+            args = self.parser.parse_args(shlex.split(line))
+        except SystemExit as e:
+            # argparse exits after --help and on usage errors.
+            return not e.code
+        try:
+            with measured(args):
+                run(args, self)
+        except BrokenPipeError:
+            # The reader went away; main() handles it for the whole process.
+            raise
+        except KeyboardInterrupt:
+            # Ctrl-C stops a long command (`list`, `flush --every`), not the shell.
+            print("\n❌ Interrupted", file=sys.stderr)
+            return False
+        except SystemExit as e:
+            # `batch` exits non-zero when one of its commands failed.
+            return not e.code
+        except Exception as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return False
+        return True
+
+
+def run(args, session):
+    if args.command == "login":
+        from donor.user_manager import admin_login
+        admin_login(args.email, args.password)
+        # Managers hold the old token.
+        session.managers.clear()
+
+    elif args.command == "list":
+        session.manager(args.backend).list_donations(args.page_size, args.limit, args.since,
+                                                     args.offline, args.max_age)
+
+    elif args.command == "sync":
+        session.manager(args.backend).sync()
+
+    elif args.command == "add":
+        session.manager(args.backend).add_donation(args.name, args.amount, args.wait)
+
+    elif args.command == "flush":
+        manager = session.manager(args.backend)
+        manager.flush(args.batch_size, args.concurrency)
+        while args.every is not None:
+            time.sleep(args.every)
+            manager.flush(args.batch_size, args.concurrency)
+
+    elif args.command == "outbox":
+        if args.outbox == "requeue":
+            session.manager(args.backend).outbox_requeue()
+        else:
+            session.manager(args.backend).outbox_status()
+
+    elif args.command == "import":
+        session.manager(args.backend).import_donations(args.file, args.format,
+                                                       args.concurrency, args.restart)
+
+    elif args.command == "report":
+        session.manager(args.backend).report(args.report, args.format,
+                                             getattr(args, "period", "day"),
+                                             getattr(args, "top", 10), args.since,
+                                             args.offline, args.max_age)
+
+    elif args.command == "search":
+        session.manager(args.backend).search(args.query, args.kind, args.limit)
+
+    elif args.command == "shell":
+        shell(session)
+
+    elif args.command == "batch":
+        batch(session, args.file)
+
+    else:
+        session.parser.print_help()
+
+
+def shell(session):
+    try:
+        import readline  # noqa: F401 - line editing and history for input()
+    except ImportError:
+        pass
+    print("Wema donor shell. Type a command without the `donor` prefix, or `exit`.")
+    while True:
+        try:
+            line = input("donor> ").strip()
+        except EOFError:
+            print()
+            return
+        except KeyboardInterrupt:
+            print()
+            continue
+        if line in ("exit", "quit"):
+            return
+        if line and not line.startswith("#"):
+            session.execute(line)
+
+
+def batch(session, path):
+    stream = sys.stdin if path == "-" else open(path)
+    failed = 0
+    with stream:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith("#") and not session.execute(line):
+                failed += 1
+    if failed:
+        print(f"❌ {failed} command(s) failed", file=sys.stderr)
+        sys.exit(1)
+
+
+def main(argv=None):
+    try:
+        _main(argv)
+    except BrokenPipeError:
+        # `donor report ... | head` closed stdout. Point it at devnull so the
+        # interpreter's final flush does not raise again on the way out.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+def _main(argv):
+    session = Session()
+    args = session.parser.parse_args(argv)
+    with measured(args):
+        run(args, session)
+
+
+@contextmanager
+def measured(args):
+    """Apply --timings, --timings-json and --profile around one command,
+    whether it came from the command line or a shell/batch line."""
+    if not (args.timings or args.timings_json or args.profile):
+        yield
+        return
+
+    from donor import timings
+    with timings.collecting():
+        profiler = None
+        if args.profile:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                import pstats
+                profiler.disable()
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+            if args.timings or args.profile:
+                timings.report()
+            if args.timings_json:
+                timings.dump(args.timings_json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.orm import sessionmaker, declarative_base
+
+
+# Create the Base class for all our ORM models
+Base = declarative_base()
+
+# SQLite file in the working directory unless DONOR_DATABASE_URL says otherwise
+DATABASE_URL = os.environ.get("DONOR_DATABASE_URL", "sqlite:///donor.db")
+
+engine = create_engine(DATABASE_URL, echo=False)
+
+
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_conn, record):
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_conn.cursor()
+    # WAL lets readers run alongside the single writer; NORMAL only fsyncs at
+    # checkpoints, which is safe under WAL.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    cursor.close()
+
+
+# Session factory; expire_on_commit=False keeps loaded rows usable after the
+# session_scope() that produced them has closed.
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+
+@contextmanager
+def session_scope():
+    """Yield a session that commits on success, rolls back on error and always closes."""
+    session = SessionLocal()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def init_db():
+    """Create missing tables and indexes, including indexes on tables that
+    predate them, and upgrade databases created by older versions."""
+    from donor import models  # noqa: F401 - registers the models on Base
+
+    Base.metadata.create_all(engine)
+    _allow_null_email()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def _allow_null_email():
+    """Drop NOT NULL from donors.email on databases made before donors could
+    be created from Wema donations, which carry no email."""
+    email = next(c for c in inspect(engine).get_columns("donors") if c["name"] == "email")
+    if email["nullable"]:
+        return
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE donors ALTER COLUMN email DROP NOT NULL")
+        return
+    if engine.dialect.name != "sqlite":
+        raise RuntimeError("donors.email must allow NULL; run "
+                           "ALTER TABLE donors to make it nullable, then retry")
+
+    # SQLite cannot alter a column, so the table is rebuilt. Foreign keys are
+    # off for the swap: dropping donors would otherwise trip the donations
+    # that reference it, and the pragma is a no-op inside a transaction.
+    table = Base.metadata.tables["donors"]
+    columns = ", ".join(c.name for c in table.columns)
+    create = str(CreateTable(table).compile(engine)).replace(
+        "CREATE TABLE donors", "CREATE TABLE donors_new", 1)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        conn.commit()  # end the autobegun transaction so the swap gets its own
+        try:
+            with conn.begin():
+                conn.exec_driver_sql(create)
+                conn.exec_driver_sql(f"INSERT INTO donors_new ({columns}) SELECT {columns} FROM donors")
+                conn.exec_driver_sql("DROP TABLE donors")
+                conn.exec_driver_sql("ALTER TABLE donors_new RENAME TO donors")
+                # The search index's triggers went with the old table; search
+                # rebuilds index and triggers on first use.
+                conn.exec_driver_sql("DROP TABLE IF EXISTS donors_fts")
+                if conn.exec_driver_sql("PRAGMA foreign_key_check").first():
+                    raise RuntimeError("donors rebuild left dangling foreign keys")
+        finally:
+            conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+            conn.commit()
@@ -1,21 +1,182 @@
-from donor.api_client import WemaAPI
-from donor.auth import load_token
+import sys
+import uuid
+from itertools import islice
 
-BASE_URL = "http://localhost:5000"
+from donor.api_client import WemaAPI, PAGE_SIZE
+from donor.auth import load_token, BASE_URL
+from donor import timings
+
+FLUSH_EVERY = 1000
 
 class DonorManager:
-    def __init__(self):
-        token = load_token()
-        self.api = WemaAPI(BASE_URL, token)
-
-    def list_donations(self):
-        donations = self.api.get("/api/donations")
-        for d in donations:
-            print(f"{d['name']} | {d['amount']} | {d['createdAt']}")
-
-    def add_donation(self, name, amount):
-        self.api.post("/api/donations", {
-            "name": name,
-            "amount": amount
-        })
-        print("✅ Donation recorded")
+    def __init__(self, backend="http"):
+        # "sql" runs against the local SQLAlchemy database instead of Wema.
+        self.store = None
+        self.api = None
+        if backend == "sql":
+            from donor.sql_backend import SQLBackend
+            self.store = SQLBackend()
+        else:
+            token = load_token()
+            self.api = WemaAPI(BASE_URL, token)
+
+    def iter_donations(self, page_size=PAGE_SIZE, limit=None, since=None,
+                       offline=False, max_age=None):
+        """Yield donations from the server, or from the local replica when
+        ``offline`` is set or ``max_age`` (seconds) allows it."""
+        if self.store:
+            return self.store.iter_donations(since, limit, page_size or PAGE_SIZE)
+
+        if offline or max_age is not None:
+            from donor.replica import Replica
+            replica = Replica()
+            age = replica.age()
+            if not offline and (age is None or age > max_age):
+                replica.sync(self.api)
+            elif age is None:
+                print("⚠️  Local replica is empty, run `donor sync` first", file=sys.stderr)
+            return replica.iter_donations(since, limit)
+
+        params = {"since": since} if since else None
+        donations = self.api.iter_items("/api/donations", params, page_size=page_size)
+        return islice(donations, limit)
+
+    def list_donations(self, page_size=PAGE_SIZE, limit=None, since=None,
+                       offline=False, max_age=None):
+        donations = iter(self.iter_donations(page_size, limit, since, offline, max_age))
+        while batch := list(islice(donations, FLUSH_EVERY)):
+            with timings.timed("render", "list"):
+                sys.stdout.write("".join(
+                    f"{d['name']} | {d['amount']} | {d['createdAt']}\n" for d in batch
+                ))
+                sys.stdout.flush()
+
+    def report(self, kind, fmt="table", period="day", top=10, since=None,
+               offline=False, max_age=None):
+        from donor import reports
+
+        if self.store:
+            with timings.timed("aggregate", "sql"):
+                summary = self.store.summary(since)
+        else:
+            donations = self.iter_donations(since=since, offline=offline, max_age=max_age)
+            with timings.timed("load", "columns"):
+                cols = reports.Columns.load(donations)
+            with timings.timed("aggregate", "columns"):
+                summary = reports.summarize(cols)
+
+        if kind == "total":
+            headers, rows = ["donations", "total"], [(summary["count"], summary["total"])]
+        elif kind == "by-donor":
+            headers, rows = ["donor", "total"], reports.ordered(summary["by_donor"])
+        elif kind == "by-campaign":
+            headers, rows = ["campaign", "total"], reports.ordered(summary["by_campaign"])
+        elif kind == "top":
+            headers, rows = ["donor", "total"], reports.top(summary, top)
+        else:
+            headers, rows = [period, "total"], reports.timeseries(summary, period)
+        with timings.timed("render", kind):
+            print(reports.render(headers, rows, fmt))
+
+    def search(self, query, kind="donors", limit=10):
+        if self.store:
+            results = self.store.search(query, kind, limit)
+        elif kind == "donors":
+            from donor.replica import Replica
+            replica = Replica()
+            if replica.age() is None:
+                print("⚠️  Local replica is empty, run `donor sync` first", file=sys.stderr)
+            results = replica.search(query, limit)
+        else:
+            print("❌ Campaign search needs --backend sql")
+            return
+
+        if not results:
+            print(f"ℹ️  No {kind} matching '{query}' found")
+            return
+        for r in results:
+            if kind == "campaigns":
+                print(f"{r['id']}: {r['title']} — {r.get('description') or '(no description)'}")
+            elif "id" in r:
+                print(f"{r['id']}: {r['name']} <{r.get('email') or 'no email'}>")
+            else:
+                print(r["name"])
+
+    def sync(self):
+        if self.store:
+            print("ℹ️  The sql backend is already local, nothing to sync")
+            return
+        from donor.replica import Replica
+        replica = Replica()
+        count = replica.sync(self.api)
+        print(f"✅ Synced {count} donations ({replica.count()} stored locally)")
+
+    def add_donation(self, name, amount, wait=False):
+        if self.store:
+            from sqlalchemy.exc import SQLAlchemyError
+            try:
+                self.store.add_donation(name, amount)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            except SQLAlchemyError as e:
+                print(f"❌ Database error: {getattr(e, 'orig', None) or e}")
+                return
+            print("✅ Donation recorded")
+            return
+        from donor.outbox import Outbox
+        data = {"name": name, "amount": amount}
+        if wait:
+            # The key makes the POST safe to retry after a 502 or a timeout.
+            self.api.post("/api/donations", data, {"Idempotency-Key": uuid.uuid4().hex})
+            print("✅ Donation recorded")
+            return
+        # Journaled locally and acknowledged at once; `donor flush` sends it.
+        key = Outbox().append(data)
+        print(f"✅ Donation queued ({key})")
+
+    def flush(self, batch_size=100, concurrency=8):
+        from donor.outbox import Outbox
+        if self.store:
+            print("ℹ️  The sql backend writes directly, nothing to flush")
+            return
+        sent, rejected, error = Outbox().flush(self.api, batch_size, concurrency)
+        print(f"✅ Flushed {sent} donations")
+        if rejected:
+            print(f"   rejected: {rejected} (see outbox.rejects.ndjson, "
+                  "then `donor outbox requeue`)")
+        if error is not None:
+            print(f"❌ Flush stopped, remaining donations stay queued: {error}")
+
+    def outbox_status(self):
+        from donor.outbox import Outbox
+        status = Outbox().status()
+        print(f"queued: {status['depth']}  lag: {status['lag']:.0f}s  "
+              f"rejected: {status['rejected']}  awaiting compaction: {status['flushed']}  "
+              f"journal: {status['bytes']} bytes")
+
+    def outbox_requeue(self):
+        from donor.outbox import Outbox
+        count = Outbox().requeue()
+        print(f"✅ Requeued {count} rejected donations; run `donor flush` to send them")
+
+    def import_donations(self, path, fmt=None, concurrency=32, restart=False):
+        from donor.importer import Importer
+
+        if self.store:
+            importer = Importer(store=self.store)
+        else:
+            # 429s are left to the importer so it can shrink its window instead
+            # of having urllib3 sleep on them behind its back.
+            api = WemaAPI(BASE_URL, self.api.token, pool_size=concurrency,
+                          retry_statuses=(502, 503, 504))
+            importer = Importer(api, concurrency)
+        stats = importer.run(path, fmt, restart=restart)
+        rate = stats["posted"] / stats["elapsed"] if stats["elapsed"] else 0
+        print(f"✅ Imported {stats['posted']} donations in {stats['elapsed']:.1f}s ({rate:.0f} rows/s)")
+        print(f"   rejected: {stats['rejected']}  failed: {stats['failed']}  "
+              f"skipped: {stats['skipped']}  throttled: {stats['throttled']}")
+        if stats["rejected"]:
+            print(f"   rejected rows written to {stats['rejects']}")
+        if stats["failed"]:
+            print("   failed rows were not checkpointed; run the import again to retry them")
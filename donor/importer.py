@@ -0,0 +1,255 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+MAX_IN_FLIGHT = 32
+MAX_ATTEMPTS = 6
+BATCH_SIZE = 1000
+# A burst of 429s from one overload should halve the window once, not per reply.
+THROTTLE_COOLDOWN = 1.0
+# 4xx answers that say nothing about the row itself; like 5xx they are
+# retried on the next run instead of being rejected.
+TRANSIENT_STATUSES = {401, 403, 408, 429}
+
+
+def read_rows(path, fmt=None):
+    """Yield ``(line, record)`` for each record of a CSV or NDJSON file.
+
+    ``line`` is the 1-based physical line the record starts on, the number
+    an editor shows, so rejects can be found and fixed by it.
+    """
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            # csv.reader rather than DictReader, which hides the blank rows
+            # that line_num has to be counted across.
+            reader = csv.reader(f)
+            header = next((row for row in reader if row), [])
+            start = reader.line_num + 1
+            for row in reader:
+                if row:
+                    yield start, dict(zip(header, row))
+                # line_num is the last line read; a quoted field can span
+                # several.
+                start = reader.line_num + 1
+        else:
+            for line, text in enumerate(f, 1):
+                if text.strip():
+                    yield line, text
+
+
+def validate(record):
+    """Return the ``name``/``amount`` payload for a record or raise ValueError."""
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+
+    try:
+        amount = float(str(record.get("amount")).strip())
+    except ValueError:
+        raise ValueError(f"amount must be a number: {record.get('amount')!r}")
+    if not amount.is_integer():
+        raise ValueError(f"amount must be a whole number: {record.get('amount')!r}")
+    if amount <= 0:
+        raise ValueError("amount must be greater than zero")
+
+    return {"name": name, "amount": int(amount)}
+
+
+class _Window:
+    """In-flight limit that grows by one per window of successes and halves on 429."""
+
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self.last_cut = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, ok):
+        with self.cond:
+            self.in_flight -= 1
+            if ok:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+    def throttle(self):
+        with self.cond:
+            now = time.monotonic()
+            if now - self.last_cut >= THROTTLE_COOLDOWN:
+                self.limit = max(1.0, self.limit / 2)
+                self.last_cut = now
+
+
+class Importer:
+    def __init__(self, api=None, concurrency=MAX_IN_FLIGHT, store=None):
+        # With a store, rows are written in batched transactions instead of POSTed.
+        self.api = api
+        self.store = store
+        self.window = _Window(concurrency)
+        self.pool_size = concurrency
+        self.lock = threading.Lock()
+        self.stats = {"posted": 0, "rejected": 0, "failed": 0, "skipped": 0, "throttled": 0}
+
+    def run(self, path, fmt=None, checkpoint=None, rejects=None, restart=False):
+        """Post every valid row in ``path`` and return the run statistics.
+
+        Posted and rejected row numbers are appended to ``checkpoint`` so a
+        rerun skips them; rows that failed on a transport error, a 5xx or a
+        transient 4xx are not, and are sent again. Rejected rows are appended
+        to ``rejects`` as NDJSON with ``_line`` and ``_error`` fields and can
+        be fixed and re-imported.
+        """
+        checkpoint = checkpoint or f"{path}.checkpoint"
+        source = os.path.realpath(path)
+        rejects = rejects or f"{path}.rejects.ndjson"
+        done = set() if restart else _load_checkpoint(checkpoint)
+        if not restart:
+            _trim_torn_tail(checkpoint)
+
+        started = time.monotonic()
+        mode = "w" if restart else "a"
+        with open(checkpoint, mode) as self._checkpoint, \
+                open(rejects, mode, encoding="utf-8") as self._rejects:
+            with ThreadPoolExecutor(max_workers=self.pool_size) as pool:
+                batch = []
+                for line, record in read_rows(path, fmt):
+                    if line in done:
+                        self.stats["skipped"] += 1
+                        continue
+                    try:
+                        row = validate(record)
+                    except ValueError as e:
+                        self._finish(line, record, e, "rejected")
+                        continue
+                    if self.store:
+                        batch.append((line, record, row))
+                        if len(batch) >= BATCH_SIZE:
+                            self._write(batch)
+                            batch = []
+                        continue
+                    self.window.acquire()
+                    pool.submit(self._send, line, record, row, _idempotency_key(source, line, row))
+                if batch:
+                    self._write(batch)
+
+        self.stats["elapsed"] = time.monotonic() - started
+        self.stats["checkpoint"] = checkpoint
+        self.stats["rejects"] = rejects
+        return self.stats
+
+    def _send(self, line, record, row, key):
+        ok = False
+        try:
+            for attempt in range(MAX_ATTEMPTS):
+                try:
+                    # The key lets the server drop a row that was posted
+                    # before a crash but never made it into the checkpoint.
+                    self.api.post("/api/donations", row, {"Idempotency-Key": key})
+                except requests.HTTPError as e:
+                    res = e.response
+                    if res is not None and res.status_code == 429 and attempt < MAX_ATTEMPTS - 1:
+                        self.window.throttle()
+                        with self.lock:
+                            self.stats["throttled"] += 1
+                        time.sleep(_retry_after(res, attempt))
+                        continue
+                    if res is not None and 400 <= res.status_code < 500 \
+                            and res.status_code not in TRANSIENT_STATUSES:
+                        self._finish(line, record, e, "rejected")
+                    else:
+                        self._finish(line, record, e, "failed")
+                    return
+                except requests.RequestException as e:
+                    self._finish(line, record, e, "failed")
+                    return
+                ok = True
+                self._finish(line, record, None, "posted")
+                return
+        finally:
+            self.window.release(ok)
+
+    def _write(self, batch):
+        try:
+            self.store.add_donations([row for _, _, row in batch], len(batch))
+        except Exception as e:
+            for line, record, _ in batch:
+                self._finish(line, record, e, "failed")
+            return
+        for line, record, _ in batch:
+            self._finish(line, record, None, "posted")
+
+    def _finish(self, line, record, error, outcome):
+        with self.lock:
+            self.stats[outcome] += 1
+            if outcome == "failed":
+                # Left out of the checkpoint so the next run sends it again.
+                return
+            if error is not None:
+                if isinstance(record, str):
+                    record = _as_object(record)
+                reject = dict(record, _line=line, _error=str(error))
+                self._rejects.write(json.dumps(reject) + "\n")
+                self._rejects.flush()
+            self._checkpoint.write(f"{line}\n")
+            self._checkpoint.flush()
+
+
+def _load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        # A torn last line from a crash is ignored; that row is simply resent.
+        return {int(line) for line in f if line.endswith("\n")}
+
+
+def _idempotency_key(source, line, row):
+    """Stable key for one row of one file, so reruns reuse it."""
+    ident = json.dumps([source, line, row], sort_keys=True)
+    return hashlib.sha256(ident.encode()).hexdigest()[:32]
+
+
+def _trim_torn_tail(path):
+    """Cut an unterminated last line so appends do not extend it: a torn
+    "12" followed by "13\n" would read back as row 1213."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def _as_object(line):
+    try:
+        record = json.loads(line)
+    except ValueError:
+        record = None
+    return record if isinstance(record, dict) else {"_raw": line.rstrip("\n")}
+
+
+def _retry_after(res, attempt):
+    try:
+        return float(res.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return 0.5 * 2 ** attempt
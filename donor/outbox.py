@@ -0,0 +1,212 @@
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from donor.replica import CACHE_DIR
+
+BATCH_SIZE = 100
+CONCURRENCY = 8
+# 4xx answers that are about the session or the server's load, not the
+# donation: an expired token must not throw away the queue.
+TRANSIENT_STATUSES = {401, 403, 408, 429}
+
+
+class Outbox:
+    """Append-only journal of donation writes waiting to reach Wema.
+
+    ``outbox.ndjson`` holds one entry per queued write and ``outbox.done``
+    the keys of entries the server has accepted. Both are only ever
+    appended to and fsynced; ``compact()`` rewrites the journal without the
+    done entries and empties the done file.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.journal = os.path.join(directory, "outbox.ndjson")
+        self.done = os.path.join(directory, "outbox.done")
+        self.rejects = os.path.join(directory, "outbox.rejects.ndjson")
+
+    def append(self, data):
+        """Durably queue ``data`` and return its idempotency key."""
+        entry = {"key": uuid.uuid4().hex, "ts": time.time(), "data": data}
+        with self._lock("journal"):
+            _append(self.journal, json.dumps(entry) + "\n")
+        return entry["key"]
+
+    def pending(self):
+        # A requeue interrupted before it cleared the rejects file can leave
+        # a key in the journal twice; it is only sent once.
+        seen = set(_lines(self.done))
+        entries = []
+        for entry in _entries(self.journal):
+            if entry["key"] not in seen:
+                seen.add(entry["key"])
+                entries.append(entry)
+        return entries
+
+    def status(self):
+        pending = self.pending()
+        oldest = min((e["ts"] for e in pending), default=None)
+        return {
+            "depth": len(pending),
+            "lag": time.time() - oldest if oldest else 0.0,
+            "flushed": sum(1 for _ in _lines(self.done)),
+            "rejected": sum(1 for _ in _entries(self.rejects)),
+            "bytes": os.path.getsize(self.journal) if os.path.exists(self.journal) else 0,
+        }
+
+    def flush(self, api, batch_size=BATCH_SIZE, concurrency=CONCURRENCY):
+        """Send pending entries in batches; returns (sent, rejected, error).
+
+        Stops at the first batch containing a transport error, a 5xx or a
+        401/403/408/429, so entries stay queued while the server is unhealthy
+        or the session has expired. Other 4xx rejections are moved to
+        ``outbox.rejects.ndjson``; ``requeue()`` puts them back once fixed.
+        """
+        # One flusher at a time; appends only take the short journal lock.
+        with self._lock("flush"):
+            try:
+                return self._send(api, batch_size, concurrency)
+            finally:
+                # Also after Ctrl-C or a crash mid-loop: keys already in the
+                # done file must leave the journal, or a later requeue() of
+                # the same key would be hidden by them.
+                if os.path.exists(self.done) and os.path.getsize(self.done):
+                    self.compact()
+
+    def _send(self, api, batch_size, concurrency):
+        sent = rejected = 0
+        error = None
+        pending = self.pending()
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            results = api.post_many(
+                "/api/donations",
+                [e["data"] for e in batch],
+                workers=concurrency,
+                headers=[{"Idempotency-Key": e["key"]} for e in batch],
+                return_exceptions=True,
+            )
+
+            done, rejects = [], []
+            for entry, result in zip(batch, results):
+                status = getattr(getattr(result, "response", None), "status_code", None)
+                if not isinstance(result, Exception) or status == 409:
+                    # 409: the server has already seen this key.
+                    done.append(entry["key"])
+                elif status is not None and 400 <= status < 500 \
+                        and status not in TRANSIENT_STATUSES:
+                    rejects.append(dict(entry, error=str(result)))
+                    done.append(entry["key"])
+                elif error is None:
+                    error = result
+
+            for reject in rejects:
+                _append(self.rejects, json.dumps(reject) + "\n")
+            if done:
+                _append(self.done, "".join(f"{key}\n" for key in done))
+            sent += len(done) - len(rejects)
+            rejected += len(rejects)
+            if error is not None:
+                break
+        return sent, rejected, error
+
+    def requeue(self):
+        """Move rejected entries back into the journal; returns how many."""
+        # A rejected key is also in the done file until the next compaction,
+        # and pending() skips done keys. Compact first, with no flush running,
+        # so the requeued entries are not hidden and then compacted away.
+        with self._lock("flush"):
+            self.compact()
+            with self._lock("journal"):
+                queued = {e["key"] for e in self.pending()}
+                rejects = {}
+                for entry in _entries(self.rejects):
+                    entry.pop("error", None)
+                    # A crash between writing a reject and its done key leaves
+                    # the entry queued already, and a later flush can reject it
+                    # again; either way it goes back once.
+                    if entry["key"] not in queued:
+                        rejects.setdefault(entry["key"], entry)
+                if rejects:
+                    _append(self.journal, "".join(json.dumps(e) + "\n" for e in rejects.values()))
+                open(self.rejects, "w").close()
+        return len(rejects)
+
+    def compact(self):
+        with self._lock("journal"):
+            pending = self.pending()
+            tmp = f"{self.journal}.tmp"
+            with open(tmp, "w") as f:
+                f.writelines(json.dumps(e) + "\n" for e in pending)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.journal)
+            # The done keys no longer appear in the journal, so the done file
+            # can go; a crash before this line only leaves stale keys behind.
+            open(self.done, "w").close()
+            _fsync_dir(self.directory)
+
+    @contextmanager
+    def _lock(self, name):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, f"outbox.{name}.lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _append(path, text):
+    fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        size = os.fstat(fd).st_size
+        # After a torn write, start on a fresh line rather than gluing the
+        # first new record onto the fragment.
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            text = "\n" + text
+        os.write(fd, text.encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _lines(path):
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        for line in f:
+            # An unterminated last line is an append that never finished its
+            # fsync, so it was never acknowledged either.
+            if line.endswith("\n"):
+                yield line.rstrip("\n")
+
+
+def _entries(path):
+    for line in _lines(path):
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # The fragment of a torn append, closed off by the next one.
+            continue
+
+
+def _fsync_dir(path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
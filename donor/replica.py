@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from donor import search as search_index
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "wema")
+REPLICA_FILE = os.path.join(CACHE_DIR, "donations.sqlite")
+BATCH_SIZE = 1000
+# `since` is exclusive, so a donation stored after a sync with the same
+# createdAt as the mark (or committed slightly out of order) would never be
+# fetched. Each sync re-reads this much before the mark; upserts by id make
+# the overlap harmless.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS donations (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    amount NUMERIC,
+    created_at TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS donations_created_at ON donations (created_at);
+CREATE TABLE IF NOT EXISTS donor_names (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT = """
+INSERT INTO donations (id, name, amount, created_at, doc) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    name = excluded.name,
+    amount = excluded.amount,
+    created_at = excluded.created_at,
+    doc = excluded.doc
+"""
+
+
+class Replica:
+    """On-disk copy of ``/api/donations`` kept current by delta syncs."""
+
+    def __init__(self, path=REPLICA_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def sync(self, api):
+        """Fetch donations newer than the high-water mark and return how many
+        new ones were stored."""
+        before = self.count()
+        high_water = self._get_meta("high_water")
+        params = {"since": _step_back(high_water)} if high_water else None
+
+        batch = []
+        for d in api.iter_items("/api/donations", params):
+            created_at = d.get("createdAt")
+            if created_at and (high_water is None or created_at > high_water):
+                high_water = created_at
+            batch.append(_row(d))
+            if len(batch) >= BATCH_SIZE:
+                self._upsert(batch)
+                batch = []
+        self._upsert(batch)
+
+        # The mark only moves once everything up to it is stored, because
+        # pages are not guaranteed to arrive in createdAt order.
+        with self.db:
+            if high_water:
+                self._set_meta("high_water", high_water)
+            self._set_meta("synced_at", str(time.time()))
+        # The overlap re-reads rows already stored, so count what is new.
+        return self.count() - before
+
+    def age(self):
+        """Seconds since the last sync, or None if the replica was never synced."""
+        synced_at = self._get_meta("synced_at")
+        return time.time() - float(synced_at) if synced_at else None
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM donations").fetchone()[0]
+
+    def iter_donations(self, since=None, limit=None):
+        query = "SELECT doc FROM donations"
+        args = []
+        if since:
+            query += " WHERE created_at > ?"
+            args.append(since)
+        query += " ORDER BY created_at LIMIT ?"
+        args.append(-1 if limit is None else limit)
+        for (doc,) in self.db.execute(query, args):
+            yield json.loads(doc)
+
+    def search(self, query, limit=10):
+        """Donor names from the replica that match ``query``, best first."""
+        with self.db:
+            # Replicas synced before donor_names existed backfill it once.
+            if not self.db.execute("SELECT 1 FROM donor_names LIMIT 1").fetchone():
+                self.db.execute("INSERT OR IGNORE INTO donor_names (name) "
+                                "SELECT DISTINCT name FROM donations WHERE name IS NOT NULL")
+            search_index.install(self.db.execute, "donor_names")
+        return [
+            {"name": name, "score": score}
+            for _, (name,), score in search_index.search(self.db.execute, "donor_names", query, limit)
+        ]
+
+    def _upsert(self, rows):
+        with self.db:
+            self.db.executemany(UPSERT, rows)
+            self.db.executemany("INSERT OR IGNORE INTO donor_names (name) VALUES (?)",
+                                [(row[1],) for row in rows if row[1] is not None])
+        return len(rows)
+
+    def _get_meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.db.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+
+def _step_back(mark):
+    try:
+        parsed = datetime.fromisoformat(mark.replace("Z", "+00:00"))
+    except ValueError:
+        return mark
+    since = (parsed - SYNC_OVERLAP).isoformat()
+    # Keep the server's own spelling so string comparisons still line up.
+    return since.replace("+00:00", "Z") if mark.endswith("Z") else since
+
+
+def _row(d):
+    key = d.get("id", d.get("_id"))
+    if key is None:
+        # Without a server id the natural key is the best we can do.
+        key = f"{d.get('createdAt')}|{d.get('name')}|{d.get('amount')}"
+    return (str(key), d.get("name"), d.get("amount"), d.get("createdAt"), json.dumps(d))
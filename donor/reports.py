@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+from array import array
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+NO_CAMPAIGN = "(none)"
+NO_DONOR = "(unknown)"
+PERIODS = ("day", "week", "month")
+
+
+class Columns:
+    """Donations held as parallel arrays, with donor and campaign names
+    dictionary-encoded to integer codes."""
+
+    def __init__(self):
+        self.amount = array("d")
+        self.donor = array("q")
+        self.campaign = array("q")
+        self.day = array("q")  # proleptic Gregorian ordinal, -1 when unknown
+        self.donors = {}
+        self.campaigns = {}
+
+    @classmethod
+    def load(cls, donations):
+        cols = cls()
+        donors, campaigns, days = cols.donors, cols.campaigns, {}
+        amount, donor, campaign, day = cols.amount.append, cols.donor.append, cols.campaign.append, cols.day.append
+
+        for d in donations:
+            name = d.get("donorId", d.get("name"))
+            if name is None:
+                name = NO_DONOR
+            camp = d.get("campaignId", d.get("campaign")) or NO_CAMPAIGN
+            stamp = (d.get("createdAt") or "")[:10]
+
+            code = donors.get(name)
+            if code is None:
+                code = donors[name] = len(donors)
+            donor(code)
+
+            code = campaigns.get(camp)
+            if code is None:
+                code = campaigns[camp] = len(campaigns)
+            campaign(code)
+
+            # Timestamps repeat heavily at day resolution, so parse each date once.
+            ordinal = days.get(stamp)
+            if ordinal is None:
+                try:
+                    ordinal = date.fromisoformat(stamp).toordinal()
+                except ValueError:
+                    ordinal = -1
+                days[stamp] = ordinal
+            day(ordinal)
+
+            amount(float(d.get("amount") or 0))
+        return cols
+
+    def __len__(self):
+        return len(self.amount)
+
+
+def summarize(cols):
+    """Aggregate total, per-donor, per-campaign and per-day sums in one pass."""
+    if np is not None:
+        return _summarize_numpy(cols)
+
+    by_donor = [0.0] * len(cols.donors)
+    by_campaign = [0.0] * len(cols.campaigns)
+    by_day = {}
+    for amount, donor, campaign, day in zip(cols.amount, cols.donor, cols.campaign, cols.day):
+        by_donor[donor] += amount
+        by_campaign[campaign] += amount
+        by_day[day] = by_day.get(day, 0.0) + amount
+    return _summary(cols, sum(cols.amount), by_donor, by_campaign, by_day)
+
+
+def _summarize_numpy(cols):
+    amount = np.frombuffer(cols.amount, dtype=np.float64)
+    by_donor = np.bincount(np.frombuffer(cols.donor, dtype=np.int64), amount, len(cols.donors))
+    by_campaign = np.bincount(np.frombuffer(cols.campaign, dtype=np.int64), amount, len(cols.campaigns))
+    days, inverse = np.unique(np.frombuffer(cols.day, dtype=np.int64), return_inverse=True)
+    by_day = dict(zip(days.tolist(), np.bincount(inverse, amount, len(days)).tolist()))
+    return _summary(cols, float(amount.sum()), by_donor.tolist(), by_campaign.tolist(), by_day)
+
+
+def _summary(cols, total, by_donor, by_campaign, by_day):
+    return {
+        "count": len(cols),
+        "total": total,
+        "by_donor": dict(zip(cols.donors, by_donor)),
+        "by_campaign": dict(zip(cols.campaigns, by_campaign)),
+        "by_day": by_day,
+    }
+
+
+def ordered(mapping):
+    """Items sorted by key. Keys can mix ints (server ids) and strings
+    (names, NO_CAMPAIGN), so they are compared as text."""
+    return sorted(mapping.items(), key=lambda kv: str(kv[0]))
+
+
+def top(summary, n=10):
+    return sorted(summary["by_donor"].items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+def timeseries(summary, period="day"):
+    """Roll the daily sums up into day, week (starting Monday) or month buckets."""
+    buckets = {}
+    for ordinal, amount in summary["by_day"].items():
+        if ordinal < 0:
+            key = "unknown"
+        else:
+            day = date.fromordinal(ordinal)
+            if period == "week":
+                day = date.fromordinal(ordinal - day.weekday())
+                key = day.isoformat()
+            elif period == "month":
+                key = day.strftime("%Y-%m")
+            else:
+                key = day.isoformat()
+        buckets[key] = buckets.get(key, 0.0) + amount
+    return sorted(buckets.items())
+
+
+def render(headers, rows, fmt="table"):
+    if fmt == "json":
+        return json.dumps([dict(zip(headers, row)) for row in rows], indent=2)
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(headers)
+        writer.writerows(rows)
+        return out.getvalue().rstrip("\n")
+    return "\n".join(" | ".join(_cell(v) for v in row) for row in [headers, *rows])
+
+
+def _cell(value):
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f"{value:.2f}"
+    return str(value)
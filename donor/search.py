@@ -0,0 +1,126 @@
+import sqlite3
+from difflib import SequenceMatcher
+
+# kind -> (content table, rowid column, indexed columns). The first column is
+# the one results are ranked and displayed by.
+INDEXES = {
+    "donors": ("donors", "id", ("name", "email")),
+    "campaigns": ("campaigns", "id", ("title", "description")),
+    # Distinct donor names in the local replica of /api/donations.
+    "donor_names": ("donor_names", "rowid", ("name",)),
+}
+
+MIN_SCORE = 0.6
+SECONDARY_WEIGHT = 0.8
+
+
+def install(execute, kind):
+    """Create the FTS5 trigram index for ``kind`` and the triggers that keep
+    it in step with its table, building it from existing rows the first time.
+
+    ``execute`` is a DB-API style ``execute(sql, params)`` on a SQLite connection.
+    """
+    table, rowid, columns = INDEXES[kind]
+    fts = f"{table}_fts"
+    # Case-insensitive B-tree indexes for prefixes too short for trigrams;
+    # created separately so indexes made before they existed gain them.
+    for c in columns:
+        execute(f"CREATE INDEX IF NOT EXISTS {table}_{c}_nocase ON {table} ({c} COLLATE NOCASE)", ())
+    exists = list(execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+    ))
+    if exists:
+        return
+    if sqlite3.sqlite_version_info < (3, 34, 0):
+        raise RuntimeError(f"search needs SQLite 3.34 or newer, found {sqlite3.sqlite_version}")
+
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', "
+            f"content_rowid='{rowid}', tokenize='trigram')", ())
+    execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts} (rowid, {cols}) VALUES (new.{rowid}, {new}); END", ())
+    execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old}); END", ())
+    execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old}); "
+            f"INSERT INTO {fts} (rowid, {cols}) VALUES (new.{rowid}, {new}); END", ())
+    execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')", ())
+
+
+def search(execute, kind, query, limit=10):
+    """Return up to ``limit`` ``(rowid, values, score)`` tuples, best first.
+
+    Prefix matches rank above substring matches, which rank above fuzzy
+    matches; fuzzy candidates are rows sharing a trigram with the query or
+    with any single-character deletion of it, so one typo still finds them.
+    """
+    table, rowid, columns = INDEXES[kind]
+    fts = f"{table}_fts"
+    q = query.strip().lower()
+    if not q:
+        return []
+    pool = max(limit * 20, 200)
+
+    if len(q) < 3:
+        # Trigrams cannot represent shorter strings. A prefix is a range in
+        # each column's NOCASE index, so this reads only the matching rows
+        # (LIKE 'x%' with an OR would scan the table).
+        upper = q[:-1] + chr(ord(q[-1]) + 1)
+        select = f"SELECT {rowid}, {', '.join(columns)} FROM {table}"
+        rows = {}
+        for c in columns:
+            for row in execute(f"{select} WHERE {c} COLLATE NOCASE >= ? "
+                               f"AND {c} COLLATE NOCASE < ? LIMIT ?", (q, upper, pool)):
+                rows.setdefault(row[0], row)
+        rows = rows.values()
+    else:
+        select = f"SELECT rowid, {', '.join(columns)} FROM {fts} WHERE {fts} MATCH ?"
+        # The quoted query is an exact substring match: every hit qualifies,
+        # so there is nothing for bm25 to order and LIMIT can stop early. Only
+        # fall back to the broader fuzzy query when it comes up short.
+        rows = list(execute(f"{select} LIMIT ?", (_quote(q), pool)))
+        if len(rows) < limit:
+            grams = _trigrams(q)
+            for i in range(len(q)):
+                grams |= _trigrams(q[:i] + q[i + 1:])
+            match = " OR ".join(_quote(g) for g in sorted(grams))
+            rows = execute(f"{select} ORDER BY bm25({fts}) LIMIT ?", (match, pool))
+
+    scored = []
+    for row in rows:
+        values = tuple(row[1:])
+        score = max(
+            _score(q, value) * (1.0 if i == 0 else SECONDARY_WEIGHT)
+            for i, value in enumerate(values)
+        )
+        if score >= MIN_SCORE:
+            scored.append((row[0], values, score))
+    scored.sort(key=lambda r: (-r[2], str(r[1][0]).lower()))
+    return scored[:limit]
+
+
+def _score(q, value):
+    v = (value or "").lower()
+    if not v:
+        return 0.0
+    words = v.split()
+    if v.startswith(q) or any(w.startswith(q) for w in words):
+        return 3.0
+    if q in v:
+        return 2.0
+    terms = q.split()
+    if len(terms) > 1:
+        # "wanjru kamau" should find "Wanjiru Kamau": score each query word on
+        # its own and average.
+        return sum(min(1.0, _score(t, v)) for t in terms) / len(terms)
+    return max(SequenceMatcher(None, q, w).ratio() for w in [v, *words])
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
@@ -0,0 +1,152 @@
+from datetime import date, datetime, timezone
+from itertools import islice
+
+from sqlalchemy import func, insert, select, update
+
+from donor import search as search_index
+from donor.db import engine, init_db, session_scope
+from donor.importer import validate
+from donor.models import Campaign, Donation, Donor
+from donor.reports import NO_CAMPAIGN
+
+BATCH_SIZE = 1000
+
+
+class SQLBackend:
+    """Local SQLAlchemy store speaking the same donation dicts as WemaAPI."""
+
+    def __init__(self):
+        init_db()
+
+    def iter_donations(self, since=None, limit=None, page_size=BATCH_SIZE):
+        stmt = (
+            select(Donation.id, Donor.name, Donation.amount, Donation.timestamp, Campaign.title)
+            .join(Donation.donor)
+            .outerjoin(Donation.campaign)
+            .where(*_since(since))
+            .order_by(Donation.timestamp)
+            .limit(limit)
+            .execution_options(yield_per=page_size)
+        )
+        with session_scope() as session:
+            for id_, name, amount, timestamp, campaign in session.execute(stmt):
+                yield {
+                    "id": id_,
+                    "name": name,
+                    "amount": amount,
+                    "createdAt": timestamp.isoformat() if timestamp else None,
+                    "campaign": campaign,
+                }
+
+    def add_donation(self, name, amount, campaign=None):
+        self.add_donations([{"name": name, "amount": amount, "campaign": campaign}])
+
+    def add_donations(self, rows, batch_size=BATCH_SIZE):
+        """Insert donation dicts in batched transactions, creating donors and
+        campaigns by name as needed. Returns the number of rows written.
+
+        Core inserts bypass the models' validators, so every row of a batch is
+        checked with ``importer.validate`` before the batch is written; an
+        invalid row raises ValueError.
+        """
+        rows = iter(rows)
+        count = 0
+        while batch := list(islice(rows, batch_size)):
+            batch = [{**r, **validate(r)} for r in batch]
+            with session_scope() as session:
+                donors = _ids(session, Donor.name, {r["name"] for r in batch})
+                campaigns = _ids(session, Campaign.title, {r["campaign"] for r in batch if r.get("campaign")})
+                session.execute(insert(Donation), [
+                    {
+                        "amount": r["amount"],
+                        "donor_id": donors[r["name"]],
+                        "campaign_id": campaigns.get(r.get("campaign")),
+                        "timestamp": _parse_time(r["createdAt"]) if r.get("createdAt") else datetime.utcnow(),
+                    }
+                    for r in batch
+                ])
+            count += len(batch)
+        return count
+
+    def update_donations(self, rows, batch_size=BATCH_SIZE):
+        """Apply ``{"id": ..., <column>: ...}`` dicts as bulk UPDATEs by primary key."""
+        rows = iter(rows)
+        count = 0
+        while batch := list(islice(rows, batch_size)):
+            with session_scope() as session:
+                session.execute(update(Donation), batch)
+            count += len(batch)
+        return count
+
+    def summary(self, since=None):
+        """Return the same shape as reports.summarize, computed with GROUP BY."""
+        where = _since(since)
+        day = func.date(Donation.timestamp)
+        with session_scope() as session:
+            count, total = session.execute(
+                select(func.count(Donation.id), func.coalesce(func.sum(Donation.amount), 0)).where(*where)
+            ).one()
+            by_donor = session.execute(
+                select(Donor.name, func.sum(Donation.amount))
+                .join(Donation.donor).where(*where).group_by(Donor.id)
+            ).all()
+            by_campaign = session.execute(
+                select(func.coalesce(Campaign.title, NO_CAMPAIGN), func.sum(Donation.amount))
+                .outerjoin(Donation.campaign).where(*where).group_by(Donation.campaign_id)
+            ).all()
+            by_day = session.execute(
+                select(day, func.sum(Donation.amount)).where(*where).group_by(day)
+            ).all()
+
+        return {
+            "count": count,
+            "total": float(total),
+            "by_donor": {name: float(amount) for name, amount in by_donor},
+            "by_campaign": {title: float(amount) for title, amount in by_campaign},
+            "by_day": {_ordinal(d): float(amount) for d, amount in by_day},
+        }
+
+    def search(self, query, kind="donors", limit=10):
+        """Ranked prefix, substring and fuzzy matches over donors or campaigns."""
+        if engine.dialect.name != "sqlite":
+            raise RuntimeError("search needs the SQLite database")
+        with session_scope() as session:
+            execute = session.connection().exec_driver_sql
+            search_index.install(execute, kind)
+            return [
+                {"id": rowid, **dict(zip(search_index.INDEXES[kind][2], values)), "score": score}
+                for rowid, values, score in search_index.search(execute, kind, query, limit)
+            ]
+
+
+def _ids(session, column, values):
+    """Map each value of a unique name column to its row id, inserting the missing ones."""
+    if not values:
+        return {}
+    model = column.class_
+    lookup = select(column, model.id).where(column.in_(values))
+    ids = dict(session.execute(lookup).all())
+    missing = values - ids.keys()
+    if missing:
+        session.execute(insert(model), [{column.key: value} for value in missing])
+        ids.update(session.execute(lookup.where(column.in_(missing))).all())
+    return ids
+
+
+def _since(since):
+    return [Donation.timestamp > _parse_time(since)] if since else []
+
+
+def _parse_time(value):
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _ordinal(day):
+    if day is None:
+        return -1
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
@@ -0,0 +1,113 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+# Recording is off unless enable() is called, so instrumented code pays for
+# one perf_counter() pair and a None check per call.
+_records = None
+
+
+def enable():
+    global _records
+    if _records is None:
+        _records = []
+
+
+def enabled():
+    return _records is not None
+
+
+def reset():
+    if _records is not None:
+        _records.clear()
+
+
+@contextmanager
+def collecting():
+    """Record into a fresh list for the duration of the block.
+
+    Afterwards the previous state comes back, with the new records appended
+    if recording was already on, so one measured shell command neither
+    sees nor loses the records of the session around it.
+    """
+    global _records
+    outer, _records = _records, []
+    try:
+        yield
+    finally:
+        inner, _records = _records, outer
+        if outer is not None:
+            outer.extend(inner)
+
+
+def record(kind, name, seconds, bytes_in=0, bytes_out=0):
+    if _records is not None:
+        _records.append({
+            "kind": kind,
+            "name": name,
+            "seconds": seconds,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+        })
+
+
+@contextmanager
+def timed(kind, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, name, time.perf_counter() - start)
+
+
+def records():
+    return list(_records or [])
+
+
+def summary():
+    """Group records by (kind, name) with count, total, p50/p95/p99 and bytes."""
+    groups = {}
+    for r in _records or []:
+        groups.setdefault((r["kind"], r["name"]), []).append(r)
+
+    rows = []
+    for (kind, name), rs in sorted(groups.items()):
+        seconds = sorted(r["seconds"] for r in rs)
+        rows.append({
+            "kind": kind,
+            "name": name,
+            "count": len(rs),
+            "total": sum(seconds),
+            "p50": _percentile(seconds, 50),
+            "p95": _percentile(seconds, 95),
+            "p99": _percentile(seconds, 99),
+            "bytes_in": sum(r["bytes_in"] for r in rs),
+            "bytes_out": sum(r["bytes_out"] for r in rs),
+        })
+    return rows
+
+
+def report(file=sys.stderr):
+    rows = summary()
+    if not rows:
+        return
+    print(f"{'kind':<8} {'name':<32} {'count':>6} {'total ms':>10} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'in KiB':>9} {'out KiB':>8}", file=file)
+    for r in rows:
+        print(f"{r['kind']:<8} {r['name'][:32]:<32} {r['count']:>6} {r['total'] * 1000:>10.1f} "
+              f"{r['p50'] * 1000:>8.2f} {r['p95'] * 1000:>8.2f} {r['p99'] * 1000:>8.2f} "
+              f"{r['bytes_in'] / 1024:>9.1f} {r['bytes_out'] / 1024:>8.1f}", file=file)
+
+
+def dump(path):
+    with open(path, "w") as f:
+        json.dump({"summary": summary(), "records": records()}, f, indent=2)
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
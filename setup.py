@@ -4,14 +4,15 @@ from setuptools import setup, find_packages
 setup(
     name="donor-cli",
     version="0.1",
-    packages=find_packages(),  # find 'donor' package
+    packages=find_packages(exclude=["bench"]),  # find 'donor' package
     install_requires=[
         "click",
         "SQLAlchemy",
+        "requests",
     ],
     entry_points={
         "console_scripts": [
-            "donor=donor.cli:cli",  # points to donor/cli.py -> cli function
+            "donor=donor.cli:main",  # points to donor/cli.py -> main function
         ],
     },
 )
@@ -0,0 +1,129 @@
+import json
+import threading
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from donor import timings
+from donor.api_client import WemaAPI, _iter_json_array
+
+
+def parse(*chunks):
+    return list(_iter_json_array(chunks))
+
+
+def split_everywhere(text):
+    """Every way of cutting ``text`` into two chunks."""
+    return [(text[:i], text[i:]) for i in range(len(text) + 1)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('[]', []),
+    (' [ ] ', []),
+    ('[1, 2, 3]', [1, 2, 3]),
+    ('[12.5, -0.25, 1e3, 2E-2]', [12.5, -0.25, 1000.0, 0.02]),
+    ('[true, false, null]', [True, False, None]),
+    ('["a,b", "]", "say \\"hi\\"", "\\\\", "\\u00e9"]', ["a,b", "]", 'say "hi"', "\\", "é"]),
+    ('[{"name": "Wanjiru", "amount": 100}, [1, [2]]]', [{"name": "Wanjiru", "amount": 100}, [1, [2]]]),
+])
+def test_every_chunk_boundary(text, expected):
+    assert json.loads(text) == expected
+    for chunks in split_everywhere(text):
+        assert parse(*chunks) == expected, chunks
+
+
+def test_one_character_chunks():
+    text = '[{"a": "x\\"y"}, 10.5e1, "z", null]'
+    assert parse(*text) == json.loads(text)
+
+
+def test_empty_chunks_are_ignored():
+    assert parse("", "[", "", "1", "", "]", "") == [1]
+
+
+def test_number_split_before_fraction_and_exponent():
+    assert parse("[12.", "5]") == [12.5]
+    assert parse("[1e", "3]") == [1000.0]
+    assert parse("[1", "0]") == [10]
+
+
+@pytest.mark.parametrize("text", ['[', '[1, 2', '[{"a": 1}', '["abc', '[12.'])
+def test_truncated_array(text):
+    with pytest.raises(ValueError, match="Truncated"):
+        parse(text)
+
+
+def test_not_an_array():
+    with pytest.raises(ValueError, match="Expected a JSON array"):
+        parse('{"data": []}')
+
+
+def test_stops_at_closing_bracket():
+    assert parse("[1]", " trailing") == [1]
+
+
+@pytest.fixture
+def server():
+    """Serve ``server.rows`` from /api/donations, honouring paging only when
+    ``server.paged`` is set, and count the requests."""
+    state = type("State", (), {"rows": [], "paged": True, "requests": 0})()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            state.requests += 1
+            query = parse_qs(urlparse(self.path).query)
+            rows = state.rows
+            if state.paged and "pageSize" in query:
+                size, page = int(query["pageSize"][0]), int(query["page"][0])
+                rows = rows[(page - 1) * size:page * size]
+            body = json.dumps(rows).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    state.api = WemaAPI(f"http://127.0.0.1:{httpd.server_address[1]}")
+    yield state
+    state.api.close()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize("count", [0, 5, 10, 25, 30])
+def test_paged_listing(server, count):
+    server.rows = [{"id": i} for i in range(count)]
+    assert list(server.api.iter_items("/api/donations", page_size=10)) == server.rows
+
+
+@pytest.mark.parametrize("count", [10, 25])
+def test_server_ignoring_paging(server, count):
+    # Exactly page_size rows used to request page 2, get the same rows back
+    # and loop forever.
+    server.paged = False
+    server.rows = [{"id": i} for i in range(count)]
+    assert list(server.api.iter_items("/api/donations", page_size=10)) == server.rows
+    assert server.requests <= 2
+
+
+@pytest.mark.parametrize("page_size, take", [(0, 2), (0, None), (10, 2), (10, None)])
+def test_timings_recorded_when_consumer_stops_early(server, page_size, take):
+    server.rows = [{"id": i} for i in range(25)]
+    with timings.collecting():
+        items = server.api.iter_items("/api/donations", page_size=page_size)
+        list(islice(items, take))
+        items.close()
+        kinds = [r["kind"] for r in timings.records()]
+    requests = server.requests
+    assert kinds.count("http") == requests
+    assert kinds.count("decode") == requests
@@ -0,0 +1,183 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from donor import importer
+from donor.api_client import WemaAPI
+from donor.importer import Importer, _Window, read_rows
+
+
+@pytest.fixture
+def server():
+    """POST /api/donations stub. ``server.answers`` is a list of statuses to
+    send before falling back to 201; accepted bodies are kept per
+    Idempotency-Key."""
+    state = type("State", (), {})()
+    state.answers = []
+    state.stored = {}
+    state.keys = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            key = self.headers.get("Idempotency-Key")
+            with lock:
+                status = state.answers.pop(0) if state.answers else 201
+                state.keys.append(key)
+                if status == 201:
+                    state.stored.setdefault(key, data)
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def api(url, concurrency=4):
+    # Same settings as DonorManager.import_donations, without backoff sleeps.
+    return WemaAPI(url, "tok", pool_size=concurrency, retries=0,
+                   retry_statuses=(502, 503, 504))
+
+
+def dead_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def csv_file(tmp_path, *rows):
+    path = tmp_path / "donations.csv"
+    path.write_text("name,amount\n" + "".join(f"{r}\n" for r in rows))
+    return str(path)
+
+
+def read_rejects(path):
+    with open(f"{path}.rejects.ndjson") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_rows_reports_physical_lines(tmp_path):
+    path = tmp_path / "d.csv"
+    path.write_text('\nname,amount\nA,1\n\n"multi\nline",2\nC,3\n')
+    assert [line for line, _ in read_rows(str(path))] == [3, 5, 7]
+
+    path = tmp_path / "d.ndjson"
+    path.write_text('{"name": "A"}\n\n{"name": "B"}\n')
+    assert [line for line, _ in read_rows(str(path))] == [1, 3]
+
+
+def test_rejects_point_at_file_lines(tmp_path, server):
+    path = csv_file(tmp_path, "A,1", ",2", "C,-3")
+    stats = Importer(api(server.url)).run(path)
+    assert (stats["posted"], stats["rejected"]) == (1, 2)
+    assert sorted(r["_line"] for r in read_rejects(path)) == [3, 4]
+
+
+def test_resume_after_outage(tmp_path, server):
+    path = csv_file(tmp_path, "A,1", "B,2", "C,3", ",4")
+
+    stats = Importer(api(dead_url())).run(path)
+    assert (stats["posted"], stats["failed"], stats["rejected"]) == (0, 3, 1)
+    # Only the invalid row is finished; the failed ones are not rejects either.
+    assert [r["_line"] for r in read_rejects(path)] == [5]
+
+    stats = Importer(api(server.url)).run(path)
+    assert (stats["posted"], stats["skipped"], stats["failed"]) == (3, 1, 0)
+    assert len(server.stored) == 3
+
+    stats = Importer(api(server.url)).run(path)
+    assert (stats["posted"], stats["skipped"]) == (0, 4)
+
+
+def test_server_errors_are_retried_next_run(tmp_path, server):
+    path = csv_file(tmp_path, "A,1")
+    server.answers = [500]
+    assert Importer(api(server.url)).run(path)["failed"] == 1
+    assert Importer(api(server.url)).run(path)["posted"] == 1
+
+
+@pytest.mark.parametrize("status, outcome", [
+    (400, "rejected"), (422, "rejected"),
+    (401, "failed"), (403, "failed"), (408, "failed"),
+])
+def test_client_errors(tmp_path, server, status, outcome):
+    path = csv_file(tmp_path, "A,1")
+    server.answers = [status]
+    assert Importer(api(server.url)).run(path)[outcome] == 1
+    rerun = Importer(api(server.url)).run(path)
+    assert rerun["skipped" if outcome == "rejected" else "posted"] == 1
+
+
+def test_restart_rewrites_rejects_and_reuses_keys(tmp_path, server):
+    path = csv_file(tmp_path, "A,1", ",2")
+    Importer(api(server.url)).run(path)
+    Importer(api(server.url)).run(path, restart=True)
+    assert len(read_rejects(path)) == 1
+    # Same file, line and row: the server sees the same key and keeps one copy.
+    assert server.keys[0] == server.keys[1]
+    assert len(server.stored) == 1
+
+
+def test_429_shrinks_window_and_retries(tmp_path, server, monkeypatch):
+    monkeypatch.setattr(importer, "THROTTLE_COOLDOWN", 0.0)
+    path = csv_file(tmp_path, *(f"D{i},{i + 1}" for i in range(20)))
+    server.answers = [429] * 5
+    imp = Importer(api(server.url, 8), concurrency=8)
+    stats = imp.run(path)
+    assert (stats["posted"], stats["throttled"], stats["failed"]) == (20, 5, 0)
+    assert imp.window.limit < 8
+    assert len(server.stored) == 20
+
+
+def test_window_halves_once_per_cooldown():
+    window = _Window(16)
+    window.throttle()
+    window.throttle()
+    assert window.limit == 8
+    window.last_cut = time.monotonic() - importer.THROTTLE_COOLDOWN
+    window.throttle()
+    assert window.limit == 4
+
+
+def test_window_grows_and_blocks():
+    window = _Window(2)
+    window.limit = 1.0
+    window.acquire()
+    acquired = threading.Event()
+    threading.Thread(target=lambda: (window.acquire(), acquired.set()), daemon=True).start()
+    assert not acquired.wait(0.1)
+    window.release(ok=True)
+    assert acquired.wait(1)
+    assert window.limit == 2.0
+
+
+def test_torn_checkpoint_line_is_resent_not_merged(tmp_path, server):
+    path = csv_file(tmp_path, *(f"D{i},1" for i in range(3)))
+    # Lines 2 and 3 finished; the write for line 4 was torn after one digit.
+    with open(f"{path}.checkpoint", "w") as f:
+        f.write("2\n3\n4")
+    stats = Importer(api(server.url)).run(path)
+    assert (stats["posted"], stats["skipped"]) == (1, 2)
+    with open(f"{path}.checkpoint") as f:
+        assert f.read().split() == ["2", "3", "4"]
@@ -0,0 +1,176 @@
+import json
+
+import pytest
+import requests
+
+from donor.outbox import Outbox
+
+
+def http_error(status):
+    res = requests.Response()
+    res.status_code = status
+    return requests.HTTPError(f"{status} error", response=res)
+
+
+class FakeAPI:
+    """post_many stand-in. ``answers`` maps a donation name to the exception
+    to return for it; ``interrupt_after`` raises KeyboardInterrupt once that
+    many batches have been answered."""
+
+    def __init__(self, answers=None, interrupt_after=None):
+        self.answers = answers or {}
+        self.interrupt_after = interrupt_after
+        self.batches = []
+
+    def post_many(self, path, items, workers=None, headers=None, return_exceptions=False):
+        if self.interrupt_after is not None and len(self.batches) >= self.interrupt_after:
+            raise KeyboardInterrupt
+        self.batches.append([(d["name"], h["Idempotency-Key"]) for d, h in zip(items, headers)])
+        return [self.answers.get(d["name"], d) for d in items]
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(str(tmp_path))
+
+
+def queue(outbox, *names):
+    return [outbox.append({"name": n, "amount": 1}) for n in names]
+
+
+def pending_names(outbox):
+    return [e["data"]["name"] for e in outbox.pending()]
+
+
+def test_flush_sends_with_keys_and_compacts(outbox):
+    keys = queue(outbox, "A", "B", "C")
+    api = FakeAPI()
+    assert outbox.flush(api, batch_size=2) == (3, 0, None)
+    assert [key for batch in api.batches for _, key in batch] == keys
+    assert outbox.status()["depth"] == 0
+    assert outbox.status()["bytes"] == 0
+    assert outbox.status()["flushed"] == 0
+
+
+@pytest.mark.parametrize("error", [
+    http_error(401), http_error(403), http_error(408), http_error(429),
+    http_error(503), requests.ConnectionError("refused"),
+])
+def test_transient_failures_stay_queued(outbox, error):
+    queue(outbox, "A", "B", "C")
+    sent, rejected, err = outbox.flush(FakeAPI({"B": error}), batch_size=3)
+    assert (sent, rejected, err) == (2, 0, error)
+    assert pending_names(outbox) == ["B"]
+    assert outbox.status()["rejected"] == 0
+
+
+def test_flush_stops_at_first_failing_batch(outbox):
+    queue(outbox, "A", "B", "C", "D")
+    api = FakeAPI({"A": http_error(503)})
+    outbox.flush(api, batch_size=2)
+    assert len(api.batches) == 1
+    assert pending_names(outbox) == ["A", "C", "D"]
+
+
+def test_409_counts_as_sent(outbox):
+    queue(outbox, "A")
+    assert outbox.flush(FakeAPI({"A": http_error(409)}))[:2] == (1, 0)
+    assert outbox.pending() == []
+
+
+def test_reject_and_requeue(outbox):
+    key, = queue(outbox, "A")
+    assert outbox.flush(FakeAPI({"A": http_error(400)}))[:2] == (0, 1)
+    assert outbox.status()["depth"] == 0
+    assert outbox.status()["rejected"] == 1
+
+    assert outbox.requeue() == 1
+    assert [e["key"] for e in outbox.pending()] == [key]
+    assert outbox.status()["rejected"] == 0
+    assert "error" not in outbox.pending()[0]
+
+    api = FakeAPI()
+    assert outbox.flush(api)[:2] == (1, 0)
+    assert api.batches == [[("A", key)]]
+
+
+def test_interrupted_flush_still_compacts(outbox):
+    queue(outbox, "A", "B", "C", "D")
+    api = FakeAPI({"A": http_error(400)}, interrupt_after=1)
+    with pytest.raises(KeyboardInterrupt):
+        outbox.flush(api, batch_size=2)
+    assert pending_names(outbox) == ["C", "D"]
+    assert outbox.status()["flushed"] == 0
+
+    assert outbox.requeue() == 1
+    assert pending_names(outbox) == ["C", "D", "A"]
+    outbox.compact()
+    assert pending_names(outbox) == ["C", "D", "A"]
+
+
+def test_requeue_after_crash_before_compaction(outbox):
+    # A crash (no finally) right after a batch: the rejected key is in both
+    # the done file and the rejects file, and still in the journal.
+    key, = queue(outbox, "A")
+    with open(outbox.rejects, "a") as f:
+        f.write(json.dumps({"key": key, "ts": 0, "data": {"name": "A", "amount": 1},
+                            "error": "400"}) + "\n")
+    with open(outbox.done, "a") as f:
+        f.write(f"{key}\n")
+    assert outbox.pending() == []
+
+    assert outbox.requeue() == 1
+    assert pending_names(outbox) == ["A"]
+    outbox.compact()
+    assert pending_names(outbox) == ["A"]
+    assert outbox.status()["rejected"] == 0
+
+
+def test_requeue_after_crash_before_done_write(outbox):
+    # A crash between writing the reject and its done key: the entry is
+    # still queued, so requeue must not add it twice.
+    key, = queue(outbox, "A")
+    with open(outbox.rejects, "a") as f:
+        f.write(json.dumps({"key": key, "ts": 0, "data": {"name": "A", "amount": 1}}) + "\n")
+    assert outbox.requeue() == 0
+    with open(outbox.journal) as f:
+        assert len(f.readlines()) == 1
+    assert outbox.status()["rejected"] == 0
+
+
+def test_torn_last_line_is_ignored(outbox):
+    queue(outbox, "A")
+    with open(outbox.journal, "a") as f:
+        f.write('{"key": "torn", "ts": 0, "da')
+    with open(outbox.done, "a") as f:
+        f.write("also-torn")
+    assert pending_names(outbox) == ["A"]
+    # Later appends start a new line instead of extending the fragments.
+    queue(outbox, "B")
+    assert pending_names(outbox) == ["A", "B"]
+    assert outbox.flush(FakeAPI())[:2] == (2, 0)
+    assert outbox.pending() == []
+
+
+def test_stale_done_keys_after_crash_in_compaction(outbox):
+    # compact() replaced the journal but died before emptying the done file.
+    sent_key, = queue(outbox, "A")
+    with open(outbox.done, "a") as f:
+        f.write(f"{sent_key}\n")
+    outbox.compact()
+    with open(outbox.done, "a") as f:
+        f.write(f"{sent_key}\n")
+    queue(outbox, "B")
+    assert pending_names(outbox) == ["B"]
+    assert outbox.flush(FakeAPI())[:2] == (1, 0)
+
+
+def test_duplicate_keys_are_sent_once(outbox):
+    key, = queue(outbox, "A")
+    with open(outbox.journal) as f:
+        line = f.read()
+    with open(outbox.journal, "a") as f:
+        f.write(line)
+    api = FakeAPI()
+    outbox.flush(api)
+    assert api.batches == [[("A", key)]]
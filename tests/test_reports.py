@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+
+import pytest
+
+from donor import reports
+from donor.donor_manager import DonorManager
+from donor.reports import NO_CAMPAIGN, NO_DONOR, Columns
+
+DONATIONS = [
+    {"name": "Wanjiru", "amount": 100, "campaignId": 2, "createdAt": "2024-03-04T10:00:00Z"},
+    {"name": "Otieno", "amount": 50, "campaignId": 10, "createdAt": "2024-03-04T12:00:00Z"},
+    {"name": "Wanjiru", "amount": 25.5, "createdAt": "2024-03-11T09:00:00Z"},
+    {"amount": 10, "campaign": "Harambee", "createdAt": "2024-04-01T09:00:00Z"},
+    {"name": "Achieng", "amount": 5, "createdAt": None},
+]
+
+
+class FakeAPI:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def iter_items(self, path, params=None, page_size=None):
+        return iter(self.rows)
+
+
+def manager(rows):
+    dm = DonorManager.__new__(DonorManager)
+    dm.store, dm.api = None, FakeAPI(rows)
+    return dm
+
+
+def summary():
+    return reports.summarize(Columns.load(DONATIONS))
+
+
+def test_summarize():
+    s = summary()
+    assert s["count"] == 5
+    assert s["total"] == 190.5
+    assert s["by_donor"] == {"Wanjiru": 125.5, "Otieno": 50.0, NO_DONOR: 10.0, "Achieng": 5.0}
+    assert s["by_campaign"] == {2: 100.0, 10: 50.0, NO_CAMPAIGN: 30.5, "Harambee": 10.0}
+    assert s["by_day"][-1] == 5.0
+
+
+def test_numpy_matches_pure_python(monkeypatch):
+    if reports.np is None:
+        pytest.skip("numpy not installed")
+    with_numpy = summary()
+    monkeypatch.setattr(reports, "np", None)
+    assert summary() == with_numpy
+
+
+def test_ordered_mixes_ids_and_names():
+    # Comparing 10 with "(none)" used to raise TypeError.
+    assert [k for k, _ in reports.ordered(summary()["by_campaign"])] == [NO_CAMPAIGN, 10, 2, "Harambee"]
+
+
+def test_top():
+    assert reports.top(summary(), 2) == [("Wanjiru", 125.5), ("Otieno", 50.0)]
+
+
+@pytest.mark.parametrize("period, expected", [
+    ("day", [("2024-03-04", 150.0), ("2024-03-11", 25.5), ("2024-04-01", 10.0), ("unknown", 5.0)]),
+    ("week", [("2024-03-04", 150.0), ("2024-03-11", 25.5), ("2024-04-01", 10.0), ("unknown", 5.0)]),
+    ("month", [("2024-03", 175.5), ("2024-04", 10.0), ("unknown", 5.0)]),
+])
+def test_timeseries(period, expected):
+    assert reports.timeseries(summary(), period) == expected
+
+
+def test_render_formats_share_headers():
+    headers, rows = ["donor", "total"], [("Wanjiru", 125.5), ("Otieno", 50.0)]
+    assert reports.render(headers, rows, "table").splitlines() == [
+        "donor | total", "Wanjiru | 125.50", "Otieno | 50",
+    ]
+    assert list(csv.reader(io.StringIO(reports.render(headers, rows, "csv")))) == [
+        ["donor", "total"], ["Wanjiru", "125.5"], ["Otieno", "50.0"],
+    ]
+    assert json.loads(reports.render(headers, rows, "json")) == [
+        {"donor": "Wanjiru", "total": 125.5}, {"donor": "Otieno", "total": 50.0},
+    ]
+
+
+@pytest.mark.parametrize("kind", ["total", "by-donor", "by-campaign", "top", "timeseries"])
+@pytest.mark.parametrize("fmt", ["table", "json", "csv"])
+def test_every_report_renders(capsys, kind, fmt):
+    manager(DONATIONS).report(kind, fmt)
+    out = capsys.readouterr().out
+    assert out.strip()
+
+
+def test_by_campaign_report_with_mixed_keys(capsys):
+    manager(DONATIONS).report("by-campaign")
+    assert capsys.readouterr().out.splitlines() == [
+        "campaign | total", "(none) | 30.50", "10 | 50", "2 | 100", "Harambee | 10",
+    ]
@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+from donor import search
+
+NAMES = ["Wanjiru Kamau", "wambui Otieno", "Achieng Odhiambo", "Otieno Kamau", "Zawadi", "Waweru"]
+
+
+@pytest.fixture
+def execute():
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE donors (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT)")
+    db.executemany("INSERT INTO donors (name, email) VALUES (?, ?)",
+                   [(n, f"{n.split()[0].lower()}@example.com") for n in NAMES])
+    search.install(db.execute, "donors")
+    return db.execute
+
+
+def names(execute, query, limit=10):
+    return [values[0] for _, values, _ in search.search(execute, "donors", query, limit)]
+
+
+def test_short_prefix_is_case_insensitive(execute):
+    assert names(execute, "WA") == ["wambui Otieno", "Wanjiru Kamau", "Waweru"]
+    assert names(execute, "z") == ["Zawadi"]
+    assert names(execute, "q") == []
+
+
+def test_short_prefix_matches_secondary_column(execute):
+    assert names(execute, "ac") == ["Achieng Odhiambo"]
+
+
+def test_short_prefix_uses_index_ranges(execute):
+    queries = []
+
+    def recording(sql, params):
+        queries.append((sql, params))
+        return execute(sql, params)
+
+    search.search(recording, "donors", "zq")
+    plans = [" ".join(row[3] for row in execute(f"EXPLAIN QUERY PLAN {sql}", params))
+             for sql, params in queries]
+    assert len(plans) == 2
+    for column, plan in zip(["name", "email"], plans):
+        assert f"INDEX donors_{column}_nocase" in plan
+        assert "SCAN" not in plan
+
+
+def test_substring_and_typo(execute):
+    assert names(execute, "kamau") == ["Otieno Kamau", "Wanjiru Kamau"]
+    assert names(execute, "wanjru")[0] == "Wanjiru Kamau"
+
+
+def test_index_follows_table(execute):
+    execute("INSERT INTO donors (name) VALUES ('Wairimu')")
+    execute("UPDATE donors SET name = 'Zuberi' WHERE name = 'Zawadi'")
+    assert "Wairimu" in names(execute, "wairimu")
+    assert "Zawadi" not in names(execute, "zawadi")
+    assert names(execute, "zu") == ["Zuberi"]
+
+
+def test_install_adds_nocase_indexes_to_existing_search(execute):
+    execute("DROP INDEX donors_name_nocase")
+    search.install(execute, "donors")
+    assert list(execute("SELECT 1 FROM sqlite_master WHERE name = 'donors_name_nocase'"))